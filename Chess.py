@@ -1,6 +1,14 @@
 import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
 import pygame
 import chess
+import chess.polyglot
+
+try:
+    import cython_chess  # Optional compiled move generator for python-chess boards
+except ImportError:
+    cython_chess = None
 
 # Constants
 WIDTH, HEIGHT = 512, 512  # Chessboard dimensions
@@ -8,91 +16,280 @@ DIMENSION = 8  # Chessboard is 8x8
 SQ_SIZE = WIDTH // DIMENSION  # Size of each square
 IMAGES = {}
 
-# Initialize Pygame
-pygame.init()
-screen = pygame.display.set_mode((WIDTH, HEIGHT))
-pygame.display.set_caption("Chess")
-
-# Load images and sounds (optimized to load once)
+# Per-square lookups for drawing, indexed [row][col] with row 0 at the top of the screen
+SQUARE_RECTS = [[pygame.Rect(c * SQ_SIZE, r * SQ_SIZE, SQ_SIZE, SQ_SIZE) for c in range(DIMENSION)] for r in range(DIMENSION)]
+SQ_AT = [[chess.square(c, DIMENSION - 1 - r) for c in range(DIMENSION)] for r in range(DIMENSION)]
+# IMAGES key for each (piece type, color)
+PIECE_KEYS = {(pt, col): f"{'w' if col else 'b'}{chess.piece_symbol(pt).upper()}" for pt in range(1, 7) for col in (chess.WHITE, chess.BLACK)}
+
+# Transposition table: zobrist hash -> (depth, value, flag)
+TT = {}
+TT_SIZE = 2 ** 20  # Max entries before the table is cleared
+EXACT, LOWER, UPPER = 0, 1, 2
+
+# Piece values for move ordering, indexed by piece type (king is never a victim,
+# and a legal king capture is always safe, so it ranks as the cheapest attacker)
+PIECE_VAL = (0, 1, 3, 3, 5, 9, 0)
+
+# Material weight of each piece type for evaluation (currently a plain piece count)
+MATERIAL_VAL = (0, 1, 1, 1, 1, 1, 1)
+
+AI_DEPTH = 3  # Search depth of the computer player
+
+# Display state, set up by init_display()
+screen = None
+WOOD_COLORS = [pygame.Color(181, 136, 99), pygame.Color(240, 217, 181)]  # Wooden colors
+BOARD_BG = None  # Pre-rendered empty wooden board; it never changes
+_pieces_layer = None  # Board with pieces, redrawn only after a move or when a drag starts/ends
+_pieces_dirty = True
+
+# Initialize Pygame and create the window, fonts and cached board surfaces
+# (called from play_game, so importing this module has no side effects)
+def init_display():
+    global screen, BOARD_BG, _pieces_layer, MOVE_FONT
+    pygame.init()
+    MOVE_FONT = pygame.font.SysFont('Arial', 20, False, False)
+    screen = pygame.display.set_mode((WIDTH, HEIGHT))
+    pygame.display.set_caption("Chess")
+
+    BOARD_BG = pygame.Surface((WIDTH, HEIGHT)).convert()
+    for r in range(DIMENSION):
+        for c in range(DIMENSION):
+            pygame.draw.rect(BOARD_BG, WOOD_COLORS[(r + c) % 2], SQUARE_RECTS[r][c])
+    _pieces_layer = pygame.Surface((WIDTH, HEIGHT)).convert()
+
+def mark_pieces_dirty():
+    global _pieces_dirty
+    _pieces_dirty = True
+
+# Convert a piece image to the display format. Images whose alpha is only ever fully
+# transparent or fully opaque use a colorkey, which blits faster than per-pixel alpha.
+COLORKEY = (255, 0, 255)
+
+def prepare_piece_surface(surf):
+    alphas = set(pygame.image.tobytes(surf, 'RGBA')[3::4])
+    if not alphas <= {0, 255}:
+        return surf.convert_alpha()
+    keyed = pygame.Surface(surf.get_size()).convert()
+    keyed.fill(COLORKEY)
+    keyed.blit(surf, (0, 0))
+    keyed.set_colorkey(COLORKEY)
+    return keyed
+
+# Load one piece image scaled to SQ_SIZE, from the BMP cache if it is newer than the PNG.
+# Writing the cache is best-effort (the install folder may be read-only); the BMP is
+# written under a temporary name and renamed, so a partial file is never read.
+def _load_piece_image(piece, images_path, cache_dir):
+    png_path = os.path.join(images_path, f"{piece}.png")
+    cache_path = os.path.join(cache_dir, f"{piece}.bmp")
+    try:
+        if os.path.getmtime(cache_path) >= os.path.getmtime(png_path):
+            return pygame.image.load(cache_path)
+    except (OSError, pygame.error):
+        pass  # Missing or unreadable cache entry: rebuild it from the PNG
+    surf = pygame.transform.scale(pygame.image.load(png_path), (SQ_SIZE, SQ_SIZE))
+    try:
+        tmp_path = os.path.join(cache_dir, f"{piece}.tmp.bmp")
+        pygame.image.save(surf, tmp_path)
+        os.replace(tmp_path, cache_path)
+    except (OSError, pygame.error):
+        pass
+    return surf
+
+# Load images and sounds (optimized to load once; files are read and decoded in parallel)
 def load_resources():
     pieces = ['wP', 'wR', 'wN', 'wB', 'wQ', 'wK', 'bP', 'bR', 'bN', 'bB', 'bQ', 'bK']
     images_path = os.path.join(os.getcwd(), 'wooden_images')
-    for piece in pieces:
-        IMAGES[piece] = pygame.transform.scale(pygame.image.load(os.path.join(images_path, f"{piece}.png")), (SQ_SIZE, SQ_SIZE))
+    cache_dir = os.path.join(os.getcwd(), '.cache', str(SQ_SIZE))  # Pre-scaled BMPs for this square size
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+    except OSError:
+        pass  # No cache this run; images are scaled from the PNGs
 
     sounds_path = os.path.join(os.getcwd(), './dist/sounds')
-    move_sound = pygame.mixer.Sound(os.path.join(sounds_path, 'move.mp3'))
-    capture_sound = pygame.mixer.Sound(os.path.join(sounds_path, 'capture.mp3'))
-    check_sound = pygame.mixer.Sound(os.path.join(sounds_path, 'check.mp3'))
-    checkmate_sound = pygame.mixer.Sound(os.path.join(sounds_path, 'checkmate.mp3'))
-    castle_sound = pygame.mixer.Sound(os.path.join(sounds_path, 'castle.mp3'))
+    sound_names = ['move', 'capture', 'check', 'checkmate', 'castle']
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        image_futures = {piece: executor.submit(_load_piece_image, piece, images_path, cache_dir) for piece in pieces}
+        sound_futures = [executor.submit(pygame.mixer.Sound, os.path.join(sounds_path, f"{name}.mp3")) for name in sound_names]
+
+    # Converting to the display's pixel format stays on the main thread
+    for piece, future in image_futures.items():
+        IMAGES[piece] = prepare_piece_surface(future.result())
+    move_sound, capture_sound, check_sound, checkmate_sound, castle_sound = (future.result() for future in sound_futures)
     return move_sound, capture_sound, check_sound, checkmate_sound, castle_sound
 
 # Utility function to evaluate the board
 def evaluate_board(board):
     eval = 0
     for piece_type in range(1, 7):
-        eval += len(board.pieces(piece_type, chess.WHITE)) - len(board.pieces(piece_type, chess.BLACK))
+        eval += MATERIAL_VAL[piece_type] * (len(board.pieces(piece_type, chess.WHITE)) - len(board.pieces(piece_type, chess.BLACK)))
     return eval
 
-# Minimax algorithm with alpha-beta pruning (optimized to avoid redundant calculations)
-def minimax(board, depth, alpha, beta, is_maximizing):
-    if depth == 0 or board.is_game_over():
-        return evaluate_board(board)
-
-    legal_moves = list(board.legal_moves)
-
-    best_eval = float('-inf') if is_maximizing else float('inf')
+# Change in evaluate_board's score caused by a move (call before pushing it)
+def material_delta(board, move):
+    delta = 0
+    if board.is_capture(move):
+        victim = chess.PAWN if board.is_en_passant(move) else board.piece_type_at(move.to_square)
+        delta += MATERIAL_VAL[victim]
+    if move.promotion:
+        delta += MATERIAL_VAL[move.promotion] - MATERIAL_VAL[chess.PAWN]
+    return delta if board.turn == chess.WHITE else -delta
+
+# Legal move generator, using the compiled backend when it is installed
+def generate_legal_moves(board):
+    if cython_chess is not None:
+        return cython_chess.generate_legal_moves(board, chess.BB_ALL, chess.BB_ALL)
+    return board.generate_legal_moves()
+
+# Legal captures (including en passant), using the compiled backend when it is installed
+def generate_legal_captures(board):
+    if cython_chess is not None:
+        yield from cython_chess.generate_legal_moves(board, chess.BB_ALL, board.occupied_co[not board.turn])
+        yield from board.generate_legal_ep()
+    else:
+        yield from board.generate_legal_captures()
 
-    for move in legal_moves:
+# Move ordering key: captures by MVV-LVA first, then promotions, then quiet moves
+def mvv_lva(board, move):
+    if board.is_capture(move):
+        victim = chess.PAWN if board.is_en_passant(move) else board.piece_type_at(move.to_square)
+        attacker = board.piece_type_at(move.from_square)
+        return -(10 * PIECE_VAL[victim] - PIECE_VAL[attacker])
+    if move.promotion:
+        return -1
+    return 0
+
+# Legal moves in search order, with the previous best move (if any) first
+def order_moves(board, pv_move=None):
+    moves = sorted(generate_legal_moves(board), key=lambda m: mvv_lva(board, m))
+    if pv_move in moves:
+        moves.remove(pv_move)
+        moves.insert(0, pv_move)
+    return moves
+
+# Quiescence search: extend leaves through captures only, so the static score is
+# never taken in the middle of an exchange. The side to move may "stand pat".
+def quiescence(board, alpha, beta, color, material):
+    best_eval = color * material
+    if best_eval >= beta:
+        return best_eval
+    alpha = max(alpha, best_eval)
+
+    for move in sorted(generate_legal_captures(board), key=lambda m: mvv_lva(board, m)):
+        child_material = material + material_delta(board, move)
         board.push(move)
-        eval = minimax(board, depth - 1, alpha, beta, not is_maximizing)
+        eval = -quiescence(board, -beta, -alpha, -color, child_material)
         board.pop()
 
-        if is_maximizing:
-            best_eval = max(best_eval, eval)
-            alpha = max(alpha, eval)
-        else:
-            best_eval = min(best_eval, eval)
-            beta = min(beta, eval)
-
-        if beta <= alpha:
-            break  # Alpha-beta pruning
+        best_eval = max(best_eval, eval)
+        alpha = max(alpha, eval)
+        if alpha >= beta:
+            break
 
     return best_eval
 
-# Get the best move for the current player
-def get_best_move(board, depth):
+# Search `moves` from the current position and return (best score, best move).
+# Scores are from the side to move's point of view: `color` is 1 when White is to
+# move and -1 when Black is, and `material` is evaluate_board(board) (White's view),
+# kept up to date incrementally by the caller.
+def search_moves(board, moves, depth, alpha, beta, color, material, pv_line=None):
+    best_eval = float('-inf')
     best_move = None
-    best_value = float('-inf') if board.turn else float('inf')
 
-    for move in board.legal_moves:
+    for i, move in enumerate(moves):
+        child_material = material + material_delta(board, move)
         board.push(move)
-        board_value = minimax(board, depth - 1, float('-inf'), float('inf'), not board.turn)
+        if i == 0:
+            eval = -negamax(board, depth - 1, -beta, -alpha, -color, child_material, pv_line)
+        else:
+            # Principal variation search: prove the move is no better than alpha with a
+            # null window (scores are integers), and re-search only if it fails high
+            eval = -negamax(board, depth - 1, -alpha - 1, -alpha, -color, child_material, pv_line)
+            if alpha < eval < beta:
+                eval = -negamax(board, depth - 1, -beta, -alpha, -color, child_material, pv_line)
         board.pop()
 
-        if (board.turn and board_value > best_value) or (not board.turn and board_value < best_value):
-            best_value = board_value
-            best_move = move
+        if eval > best_eval:
+            best_eval, best_move = eval, move
+        alpha = max(alpha, eval)
+        if alpha >= beta:
+            break  # Alpha-beta pruning
+
+    return best_eval, best_move
+
+# Negamax with alpha-beta pruning and a transposition table
+def negamax(board, depth, alpha, beta, color, material, pv_line=None):
+    if depth == 0:
+        return quiescence(board, alpha, beta, color, material)
+    if board.is_game_over():
+        return color * material
+
+    alpha_orig, beta_orig = alpha, beta
+    key = chess.polyglot.zobrist_hash(board)
+    entry = TT.get(key)
+    if entry and entry[0] >= depth:
+        _, value, flag = entry
+        if flag == EXACT:
+            return value
+        elif flag == LOWER:
+            alpha = max(alpha, value)
+        else:
+            beta = min(beta, value)
+        if alpha >= beta:
+            return value
+
+    legal_moves = order_moves(board, pv_line.get(key) if pv_line is not None else None)
+    best_eval, best_move = search_moves(board, legal_moves, depth, alpha, beta, color, material, pv_line)
+
+    # Store the result, keeping the deeper search on collisions
+    if best_eval <= alpha_orig:
+        flag = UPPER
+    elif best_eval >= beta_orig:
+        flag = LOWER
+    else:
+        flag = EXACT
+    if entry is None or entry[0] <= depth:
+        if len(TT) >= TT_SIZE:
+            TT.clear()
+        TT[key] = (depth, best_eval, flag)
+    if pv_line is not None and best_move is not None:
+        pv_line[key] = best_move
+
+    return best_eval
+
+# Root of the alpha-beta search: like negamax, but also returns the best move.
+# The window tightens after each root move so later siblings are searched narrower.
+def negamax_root(board, depth, alpha, beta, color, material, pv_move=None, pv_line=None):
+    return search_moves(board, order_moves(board, pv_move), depth, alpha, beta, color, material, pv_line)
+
+# Get the best move for the current player (iterative deepening)
+def get_best_move(board, depth):
+    best_move = None
+    pv_line = {}  # zobrist hash -> best move found by the previous iteration
+    color = 1 if board.turn == chess.WHITE else -1
+    material = evaluate_board(board)  # One full scan; the search updates it per move
+    for d in range(1, depth + 1):
+        _, best_move = negamax_root(board, d, float('-inf'), float('inf'), color, material, best_move, pv_line)
 
     return best_move
 
 # Draw the board and pieces
 def draw_board(screen, board, dragging_piece=None, dragging_pos=None):
-    wood_colors = [pygame.Color(181, 136, 99), pygame.Color(240, 217, 181)]  # Wooden colors
-    for r in range(DIMENSION):
-        for c in range(DIMENSION):
-            color = wood_colors[(r + c) % 2]
-            pygame.draw.rect(screen, color, pygame.Rect(c * SQ_SIZE, r * SQ_SIZE, SQ_SIZE, SQ_SIZE))
-            piece = board.piece_at(chess.square(c, DIMENSION - 1 - r))
-            if piece and (dragging_piece is None or chess.square(c, DIMENSION - 1 - r) != dragging_piece):
-                piece_image = f"{'w' if piece.color == chess.WHITE else 'b'}{piece.symbol().upper()}"
-                screen.blit(IMAGES[piece_image], pygame.Rect(c * SQ_SIZE, r * SQ_SIZE, SQ_SIZE, SQ_SIZE))
+    global _pieces_dirty
+    if _pieces_dirty:
+        _pieces_layer.blit(BOARD_BG, (0, 0))
+        for r in range(DIMENSION):
+            for c in range(DIMENSION):
+                square = SQ_AT[r][c]
+                piece = board.piece_at(square)
+                if piece and square != dragging_piece:
+                    _pieces_layer.blit(IMAGES[PIECE_KEYS[piece.piece_type, piece.color]], SQUARE_RECTS[r][c])
+        _pieces_dirty = False
+    screen.blit(_pieces_layer, (0, 0))
 
     if dragging_piece and dragging_pos:
         piece = board.piece_at(dragging_piece)
-        piece_image = f"{'w' if piece.color == chess.WHITE else 'b'}{piece.symbol().upper()}"
-        screen.blit(IMAGES[piece_image], (dragging_pos[0] - SQ_SIZE // 2, dragging_pos[1] - SQ_SIZE // 2))
+        screen.blit(IMAGES[PIECE_KEYS[piece.piece_type, piece.color]], (dragging_pos[0] - SQ_SIZE // 2, dragging_pos[1] - SQ_SIZE // 2))
 
 # Display check and checkmate messages
 def display_message(screen, message):
@@ -103,23 +300,43 @@ def display_message(screen, message):
     pygame.display.flip()
     pygame.time.delay(2000)
 
+# Kind of move, for choosing its sound
+QUIET, CAPTURE, CASTLE = 0, 1, 2
+
+# Classify a move from the piece being moved (call before pushing it)
+def move_kind(board, move, piece):
+    if board.piece_at(move.to_square) or (piece.piece_type == chess.PAWN and move.to_square == board.ep_square):
+        return CAPTURE
+    if piece.piece_type == chess.KING and abs(move.from_square - move.to_square) == 2:
+        return CASTLE
+    return QUIET
+
 # Function to play the appropriate sound based on the move
-def play_move_sound(move, board, move_sound, capture_sound, castle_sound):
-    if board.is_capture(move):
+def play_move_sound(kind, move_sound, capture_sound, castle_sound):
+    if kind == CAPTURE:
         capture_sound.play()
-    elif board.is_castling(move):
+    elif kind == CASTLE:
         castle_sound.play()
     else:
         move_sound.play()
 
-# Display move summary
+# Display move summary (rendered text is cached and rebuilt only when a move is added)
+MOVE_FONT = None  # Created by init_display()
+_move_surf_cache = {}
+_summary_surface = None
+_summary_len = -1
+
 def display_move_summary(screen, move_list):
-    font = pygame.font.SysFont('Arial', 20, False, False)
-    y_offset = HEIGHT - 100
-    for move in move_list:
-        text = font.render(str(move), True, pygame.Color('Black'))
-        screen.blit(text, (10, y_offset))
-        y_offset += 30
+    global _summary_surface, _summary_len
+    if len(move_list) != _summary_len:
+        _summary_surface = pygame.Surface((WIDTH - 10, 100), pygame.SRCALPHA)
+        y_offset = 0
+        for move in move_list:
+            surf = _move_surf_cache.get(move) or _move_surf_cache.setdefault(move, MOVE_FONT.render(str(move), True, pygame.Color('Black')))
+            _summary_surface.blit(surf, (0, y_offset))
+            y_offset += 30
+        _summary_len = len(move_list)
+    screen.blit(_summary_surface, (10, HEIGHT - 100))
 
 # Function to display winner
 def display_winner(screen, winner):
@@ -130,8 +347,13 @@ def display_winner(screen, winner):
     pygame.display.flip()
     pygame.time.delay(2000)
 
+# Screen area covered by a piece dragged at the given cursor position
+def drag_rect(pos):
+    return pygame.Rect(pos[0] - SQ_SIZE // 2, pos[1] - SQ_SIZE // 2, SQ_SIZE, SQ_SIZE)
+
 # Main game loop with optimized drag logic
 def play_game():
+    init_display()
     board = chess.Board()
     move_sound, capture_sound, check_sound, checkmate_sound, castle_sound = load_resources()
     running = True
@@ -139,20 +361,31 @@ def play_game():
     dragging_piece = None
     dragging_pos = None
     move_list = []  # Keep track of the moves made
+    dirty = [screen.get_rect()]  # Screen areas to present on the next frame
+    clock = pygame.time.Clock()
+    ai_thinking = False
+    ai_result = []  # Filled by the AI search thread
+    thinking_text = MOVE_FONT.render("Thinking...", True, pygame.Color('Black'))
+    thinking_rect = thinking_text.get_rect(topleft=(10, 10))
 
     while running:
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
                 running = False
+            elif event.type == pygame.VIDEOEXPOSE:
+                dirty.append(screen.get_rect())
             elif event.type == pygame.MOUSEBUTTONDOWN:
                 location = pygame.mouse.get_pos()
                 col = location[0] // SQ_SIZE
                 row = location[1] // SQ_SIZE
                 square = chess.square(col, DIMENSION - 1 - row)
 
-                if board.piece_at(square) and board.color_at(square) == board.turn:
+                if not ai_thinking and board.piece_at(square) and board.color_at(square) == board.turn:
                     dragging_piece = square
                     dragging_pos = location
+                    mark_pieces_dirty()
+                    dirty.append(SQUARE_RECTS[row][col])
+                    dirty.append(drag_rect(dragging_pos))
             elif event.type == pygame.MOUSEBUTTONUP:
                 if dragging_piece is not None:
                     location = pygame.mouse.get_pos()
@@ -162,10 +395,11 @@ def play_game():
 
                     move = chess.Move(dragging_piece, square)
                     if move in board.legal_moves:
-                        if board.piece_at(dragging_piece).piece_type == chess.PAWN and (square // 8 == 0 or square // 8 == 7):
+                        piece = board.piece_at(dragging_piece)
+                        if piece.piece_type == chess.PAWN and (square // 8 == 0 or square // 8 == 7):
                             move = chess.Move(dragging_piece, square, promotion=chess.QUEEN)
 
-                        play_move_sound(move, board, move_sound, capture_sound, castle_sound)
+                        play_move_sound(move_kind(board, move, piece), move_sound, capture_sound, castle_sound)
                         board.push(move)
                         move_list.append(move)
 
@@ -181,31 +415,50 @@ def play_game():
                             running = False
 
                         if not board.is_game_over():
-                            ai_move = get_best_move(board, 3)
-                            if ai_move:
-                                play_move_sound(ai_move, board, move_sound, capture_sound, castle_sound)
-                                board.push(ai_move)
-                                move_list.append(ai_move)
-
-                                if board.is_check():
-                                    check_sound.play()
-                                    display_message(screen, "Check!")
-
-                                if board.is_checkmate():
-                                    checkmate_sound.play()
-                                    display_message(screen, "Checkmate!")
-                                    winner = "White" if board.turn == chess.BLACK else "Black"
-                                    display_winner(screen, winner)
-                                    running = False
+                            # Search on a copy in the background so the window stays responsive
+                            ai_thinking = True
+                            threading.Thread(target=lambda b=board.copy(): ai_result.append(get_best_move(b, AI_DEPTH)), daemon=True).start()
                     dragging_piece = None
                     dragging_pos = None
+                    mark_pieces_dirty()
+                    dirty.append(screen.get_rect())  # Moves, messages and the summary may all have changed
             elif event.type == pygame.MOUSEMOTION:
                 if dragging_piece is not None:
+                    dirty.append(drag_rect(dragging_pos))
                     dragging_pos = pygame.mouse.get_pos()
-
-        draw_board(screen, board, dragging_piece, dragging_pos)
-        display_move_summary(screen, move_list)
-        pygame.display.flip()
+                    dirty.append(drag_rect(dragging_pos))
+
+        # Play the AI move once the search thread has finished
+        if ai_result:
+            ai_thinking = False
+            ai_move = ai_result.pop()
+            if ai_move:
+                play_move_sound(move_kind(board, ai_move, board.piece_at(ai_move.from_square)), move_sound, capture_sound, castle_sound)
+                board.push(ai_move)
+                move_list.append(ai_move)
+                mark_pieces_dirty()
+                dirty.append(screen.get_rect())
+
+                if board.is_check():
+                    check_sound.play()
+                    display_message(screen, "Check!")
+
+                if board.is_checkmate():
+                    checkmate_sound.play()
+                    display_message(screen, "Checkmate!")
+                    winner = "White" if board.turn == chess.BLACK else "Black"
+                    display_winner(screen, winner)
+                    running = False
+
+        # Only redraw when something changed
+        if dirty:
+            draw_board(screen, board, dragging_piece, dragging_pos)
+            display_move_summary(screen, move_list)
+            if ai_thinking:
+                screen.blit(thinking_text, thinking_rect)
+            pygame.display.update(dirty)
+            dirty.clear()
+        clock.tick(60)
 
     pygame.quit()
 